@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Compare memory and reconciliation time of dict payloads vs compact invoice records."""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from invoice_records import InvoiceBatch
+from sanitizer import sanitize_extracted_payload
+
+SUPPLIERS = [
+    ("Tech Solutions Brasil Ltda", "12.345.678/0001-90", "Rua das Tecnologias, 1500 - Florianopolis - SC"),
+    ("Contabil Moderna", "98.765.432/0001-55", "Av. Empresarial, 220 - Florianopolis - SC"),
+    ("Distribuidora Sul Ltda", "11.222.333/0001-44", "Rua do Comercio, 45 - Porto Alegre - RS"),
+]
+TAX_TYPES = ("ISS", "ICMS", "PIS", "COFINS", "IPI")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark invoice dict payloads against compact records.")
+    parser.add_argument("--invoices", type=int, default=5000, help="Number of invoices in the batch.")
+    parser.add_argument("--items", type=int, default=20, help="Items per invoice.")
+    parser.add_argument("--taxes", type=int, default=3, help="Taxes per invoice.")
+    parser.add_argument("--seed", type=int, default=26, help="Random seed.")
+    return parser.parse_args()
+
+
+def build_raw_invoice(rng: random.Random, index: int, items: int, taxes: int) -> Dict[str, Any]:
+    supplier = SUPPLIERS[index % len(SUPPLIERS)]
+    client = SUPPLIERS[(index + 1) % len(SUPPLIERS)]
+    raw_items = []
+    for position in range(items):
+        quantidade = rng.randint(1, 10)
+        unitario = rng.randint(100, 500000)
+        raw_items.append(
+            {
+                "descricao": f"Servico {position} da fatura {index}",
+                "quantidade": quantidade,
+                "valor_unitario_centavos": unitario,
+                "valor_total_item_centavos": quantidade * unitario,
+            }
+        )
+    subtotal = sum(item["valor_total_item_centavos"] for item in raw_items)
+    return {
+        "numero_fatura": f"FAT-2026-{index:06d}",
+        "data_emissao": "2026-02-10",
+        "data_vencimento": "2026-02-25",
+        "empresa_emissora": dict(zip(("nome", "cnpj", "endereco"), supplier)),
+        "cliente": dict(zip(("nome", "cnpj", "endereco"), client)),
+        "itens": raw_items,
+        "tributos": [
+            {"tipo": TAX_TYPES[position % len(TAX_TYPES)], "valor_centavos": rng.randint(0, subtotal // 10)}
+            for position in range(taxes)
+        ],
+        "subtotal_itens_centavos": subtotal if index % 50 else subtotal + 1,
+        "valor_total_fatura_centavos": subtotal,
+    }
+
+
+def measure(build: Callable[[], Any]) -> Tuple[Any, int]:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        value = build()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return value, current
+
+
+def reconcile_dicts(payloads: List[Dict[str, Any]]) -> List[Tuple[int, int, int]]:
+    mismatches = []
+    for index, payload in enumerate(payloads):
+        calculado = sum(item["valor_total_item_centavos"] for item in payload["itens"])
+        extraido = payload["subtotal_itens_centavos"]
+        if calculado != extraido:
+            mismatches.append((index, calculado, extraido))
+    return mismatches
+
+
+def timed(func: Callable[[], Any]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    value = func()
+    return value, time.perf_counter() - started
+
+
+def main() -> int:
+    args = parse_args()
+    rng = random.Random(args.seed)
+    raws = [build_raw_invoice(rng, index, args.items, args.taxes) for index in range(args.invoices)]
+    # Strings are shared by both forms, so the numbers compare container overhead only.
+    payloads, dict_bytes = measure(lambda: [sanitize_extracted_payload(raw) for raw in raws])
+    del raws
+    batch, record_bytes = measure(lambda: InvoiceBatch.from_dicts(payloads))
+
+    if batch.to_dicts() != payloads:
+        print("Error: compact records did not round-trip losslessly.")
+        return 1
+
+    dict_mismatches, dict_seconds = timed(lambda: reconcile_dicts(payloads))
+    batch_mismatches, batch_seconds = timed(batch.subtotal_mismatches)
+    if dict_mismatches != batch_mismatches:
+        print("Error: reconciliation results differ between dict and compact forms.")
+        return 1
+
+    mib = 1024 * 1024
+    print(f"invoices={args.invoices}, items/invoice={args.items}, taxes/invoice={args.taxes}")
+    print(f"dict payloads:   {dict_bytes / mib:8.2f} MiB")
+    print(f"compact records: {record_bytes / mib:8.2f} MiB ({record_bytes / dict_bytes:.1%} of dict)")
+    print(f"subtotal reconciliation: dict={dict_seconds * 1000:.1f} ms, compact={batch_seconds * 1000:.1f} ms")
+    print(f"subtotal mismatches: {len(batch_mismatches)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Benchmark text cleanup used by _as_string against the previous round-trip implementation."""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Callable, List, Tuple
+
+from sanitizer import MOJIBAKE_MARKERS, _fix_mojibake, clean_text, normalize_text
+
+CLEAN_NAMES = [
+    "Tech Soluções Brasil Ltda",
+    "Contábil Moderna",
+    "Distribuidora São João Ltda",
+    "Construções e Serviços Araújo",
+]
+CLEAN_ADDRESSES = [
+    "Rua das Tecnologias, 1500 – Florianópolis – SC",
+    "Av. Empresarial, 220 – Florianópolis – SC",
+    "Rua do Comércio, 45 – Porto Alegre – RS",
+]
+WORDS = [
+    "serviço", "manutenção", "licença", "instalação", "mão", "de", "obra", "peças",
+    "técnico", "equipamento", "configuração", "suporte", "mensal", "ação", "preço",
+]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark text cleanup over a noisy invoice corpus.")
+    parser.add_argument("--invoices", type=int, default=200, help="Number of invoices in the corpus.")
+    parser.add_argument("--items", type=int, default=1000, help="Items per invoice.")
+    parser.add_argument("--words", type=int, default=40, help="Words per item description.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing runs; the best one is reported.")
+    parser.add_argument("--seed", type=int, default=27, help="Random seed.")
+    return parser.parse_args()
+
+
+def legacy_as_string(text: str) -> str:
+    text = text.strip()
+    if text == "":
+        return text
+    if not any(marker in text for marker in MOJIBAKE_MARKERS):
+        return text
+    try:
+        fixed = text.encode("latin-1").decode("utf-8")
+    except UnicodeError:
+        return text
+    original_noise = sum(text.count(marker) for marker in MOJIBAKE_MARKERS)
+    fixed_noise = sum(fixed.count(marker) for marker in MOJIBAKE_MARKERS)
+    return fixed if fixed_noise < original_noise else text
+
+
+def repair_only(text: str) -> str:
+    """The mojibake part of normalize_text alone, to compare like for like with the legacy path."""
+    text = text.strip()
+    if "Ã" in text or "Â" in text or "Ð" in text or "�" in text:
+        return _fix_mojibake(text)
+    return text
+
+
+def garble(text: str) -> str:
+    return text.encode("utf-8").decode("latin-1")
+
+
+def noisy(rng: random.Random, text: str) -> str:
+    roll = rng.random()
+    if roll < 0.3:
+        text = garble(text)
+    elif roll < 0.4:
+        text = text.replace(" ", "  \t", 1)
+    elif roll < 0.45:
+        text = text.replace(" ", "\n", 1) + "\x00"
+    return f"  {text} " if rng.random() < 0.5 else text
+
+
+def expected_output(text: str) -> str:
+    """Reference for normalize_text: previous round-trip plus whitespace/control cleanup (not timed)."""
+    text = legacy_as_string(text)
+    if not text.isprintable():
+        text = "".join(char for char in text if char.isprintable() or char.isspace())
+    return " ".join(text.split())
+
+
+def build_corpus(args: argparse.Namespace) -> Tuple[List[str], List[str]]:
+    rng = random.Random(args.seed)
+    parties: List[str] = []
+    descriptions: List[str] = []
+    for _ in range(args.invoices):
+        for _ in range(2):
+            parties.append(noisy(rng, rng.choice(CLEAN_NAMES)))
+            parties.append(noisy(rng, rng.choice(CLEAN_ADDRESSES)))
+        for _ in range(args.items):
+            descriptions.append(noisy(rng, " ".join(rng.choices(WORDS, k=args.words))))
+    return parties, descriptions
+
+
+def best_of(func: Callable[[str], str], corpus: List[str], repeat: int, reset: Callable[[], None]) -> float:
+    timings = []
+    for _ in range(repeat):
+        reset()
+        started = time.perf_counter()
+        for text in corpus:
+            func(text)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def report(label: str, corpus: List[str], repeat: int, cached: bool) -> None:
+    chars = sum(len(text) for text in corpus)
+    print(f"{label}: fields={len(corpus)}, chars={chars}")
+    candidates = [
+        ("legacy round-trip", legacy_as_string),
+        ("mojibake repair only", repair_only),
+        ("normalize_text", normalize_text),
+    ]
+    if cached:
+        candidates.append(("clean_text (cached)", clean_text))
+    baseline = None
+    for name, func in candidates:
+        elapsed = best_of(func, corpus, repeat, clean_text.cache_clear)
+        baseline = baseline or elapsed
+        print(f"  {name:<22} {elapsed * 1000:9.1f} ms  ({baseline / elapsed:.2f}x vs legacy)")
+    if cached:
+        info = clean_text.cache_info()
+        print(f"  cache: hits={info.hits}, misses={info.misses}, size={info.currsize}/{info.maxsize}")
+
+
+def main() -> int:
+    args = parse_args()
+    parties, descriptions = build_corpus(args)
+    for text in parties + descriptions:
+        if normalize_text(text) != expected_output(text):
+            print(f"Error: unexpected normalize_text output for {text!r}")
+            return 1
+    # Only party and tax fields go through the cache; descriptions use normalize_text directly.
+    report("parties (nome/endereco)", parties, args.repeat, cached=True)
+    report("item descriptions", descriptions, args.repeat, cached=False)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
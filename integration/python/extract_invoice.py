@@ -9,13 +9,14 @@ import os
 import sys
 import warnings
 from pathlib import Path
-from typing import Any, Tuple
+from typing import Any, Optional, Tuple
 
 from dotenv import load_dotenv
 from llama_cloud import ExtractConfig
 
 warnings.filterwarnings("ignore", category=DeprecationWarning)
 from llama_cloud_services import LlamaExtract
+from profiling import DEFAULT_TOP_N, PROFILE_MODES, StageProfiler, parse_profile_mode
 from sanitizer import sanitize_extracted_payload
 
 
@@ -24,8 +25,8 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--file", required=True, help="Input file path.")
     parser.add_argument(
         "--agent-name",
-        default=os.getenv("AGENT_NAME", "Nota Fiscal"),
-        help='Published agent name.',
+        default=None,
+        help='Published agent name (default: AGENT_NAME or "Nota Fiscal").',
     )
     parser.add_argument(
         "--fallback-schema",
@@ -33,6 +34,21 @@ def parse_args() -> argparse.Namespace:
         help="Fallback schema JSON path if agent is missing.",
     )
     parser.add_argument("--out", default="examples/output/out.json", help="Output file path.")
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="full",
+        choices=PROFILE_MODES,
+        default=None,
+        help="Capture per-stage cProfile/tracemalloc data into --profile-dir; 'cpu' skips tracemalloc.",
+    )
+    parser.add_argument("--profile-dir", default="examples/output/profile", help="Profile output directory.")
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=DEFAULT_TOP_N,
+        help="Allocation sites listed per stage in allocations.txt.",
+    )
     return parser.parse_args()
 
 
@@ -91,28 +107,46 @@ def load_schema_and_config(schema_path: Path) -> Tuple[dict, ExtractConfig]:
     return data_schema, config
 
 
-def run_fallback(extractor: LlamaExtract, file_path: Path, fallback_schema_path: Path) -> Any:
+def run_fallback(
+    extractor: LlamaExtract,
+    file_path: Path,
+    fallback_schema_path: Path,
+    profiler: Optional[StageProfiler] = None,
+) -> Any:
+    profiler = profiler or StageProfiler()
     print("Fallback schema mode enabled")
-    data_schema, config = load_schema_and_config(fallback_schema_path)
-    result = extractor.extract(data_schema, config, file_path)
-    return get_run_data(result)
+    with profiler.stage("fallback_schema"):
+        data_schema, config = load_schema_and_config(fallback_schema_path)
+    with profiler.stage("extraction"):
+        result = extractor.extract(data_schema, config, file_path)
+        return get_run_data(result)
 
 
-def run_agent_first(extractor: LlamaExtract, file_path: Path, agent_name: str, fallback_schema_path: Path) -> Any:
+def run_agent_first(
+    extractor: LlamaExtract,
+    file_path: Path,
+    agent_name: str,
+    fallback_schema_path: Path,
+    profiler: Optional[StageProfiler] = None,
+) -> Any:
+    profiler = profiler or StageProfiler()
     print(f"Using agent: {agent_name}")
     try:
-        agent = extractor.get_agent(name=agent_name)
-        if not hasattr(agent, "extract"):
-            raise RuntimeError("Agent object does not support extract().")
-        result = agent.extract(file_path)
-        return get_run_data(result)
+        with profiler.stage("agent_resolution"):
+            agent = extractor.get_agent(name=agent_name)
+            if not hasattr(agent, "extract"):
+                raise RuntimeError("Agent object does not support extract().")
+        with profiler.stage("extraction"):
+            result = agent.extract(file_path)
+            return get_run_data(result)
     except Exception:
-        return run_fallback(extractor, file_path, fallback_schema_path)
+        return run_fallback(extractor, file_path, fallback_schema_path, profiler)
 
 
-def main() -> int:
-    load_env_files()
-    args = parse_args()
+def run_extraction(args: argparse.Namespace, profiler: StageProfiler) -> int:
+    with profiler.stage("env_loading"):
+        load_env_files()
+    agent_name = args.agent_name or os.getenv("AGENT_NAME", "Nota Fiscal")
 
     if not os.getenv("LLAMA_CLOUD_API_KEY"):
         print("Error: LLAMA_CLOUD_API_KEY is not set.", file=sys.stderr)
@@ -128,28 +162,31 @@ def main() -> int:
     output_file.parent.mkdir(parents=True, exist_ok=True)
 
     try:
-        extractor = LlamaExtract()
-        raw = run_agent_first(extractor, input_file, args.agent_name, fallback_schema)
+        with profiler.stage("agent_resolution"):
+            extractor = LlamaExtract()
+        raw = run_agent_first(extractor, input_file, agent_name, fallback_schema, profiler)
         if not isinstance(raw, dict):
             raise ValueError("Extraction output is not a JSON object.")
 
-        normalized = sanitize_extracted_payload(raw)
-        subtotal_calculado = sum(
-            int(item.get("valor_total_item_centavos", 0))
-            for item in normalized.get("itens", [])
-            if isinstance(item, dict)
-        )
-        subtotal_extraido = int(normalized.get("subtotal_itens_centavos", 0))
+        with profiler.stage("sanitize"):
+            normalized = sanitize_extracted_payload(raw)
+            subtotal_calculado = sum(
+                int(item.get("valor_total_item_centavos", 0))
+                for item in normalized.get("itens", [])
+                if isinstance(item, dict)
+            )
+            subtotal_extraido = int(normalized.get("subtotal_itens_centavos", 0))
         if subtotal_calculado != subtotal_extraido:
             print(
                 f"Warning: subtotal mismatch (calculated={subtotal_calculado}, extracted={subtotal_extraido})",
                 file=sys.stderr,
             )
 
-        output_file.write_text(
-            json.dumps(normalized, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        with profiler.stage("serialization"):
+            output_file.write_text(
+                json.dumps(normalized, ensure_ascii=False, indent=2),
+                encoding="utf-8",
+            )
         print(f"Saved: {output_file}")
         print(f"Summary: itens={len(normalized.get('itens', []))}, tributos={len(normalized.get('tributos', []))}")
         return 0
@@ -158,5 +195,25 @@ def main() -> int:
         return 1
 
 
+def main() -> int:
+    args = parse_args()
+    profiler = StageProfiler.for_mode(parse_profile_mode(args.profile), top_n=args.profile_top)
+    try:
+        return run_extraction(args, profiler)
+    finally:
+        if profiler.enabled:
+            profile_dir = resolve_path(args.profile_dir, repo_root())
+            # A profile that cannot be written must not replace the extraction's own exit code.
+            try:
+                profiler.write(profile_dir)
+            except OSError as exc:
+                print(
+                    f"Warning: could not write profile to {profile_dir} ({exc.__class__.__name__}): {exc}",
+                    file=sys.stderr,
+                )
+            else:
+                print(f"Profile: {profile_dir}")
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
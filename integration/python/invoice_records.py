@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import sys
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+# Signed 64-bit columns; every monetary value is already integer cents.
+CENTS_TYPECODE = "q"
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+# An int64 array, or a plain list once a value outside int64 has been appended.
+CentsColumn = Union[array, List[int]]
+
+
+def _cents_column(values: Iterable[int] = ()) -> array:
+    return array(CENTS_TYPECODE, values)
+
+
+def _fits_int64(*values: int) -> bool:
+    return all(INT64_MIN <= value <= INT64_MAX for value in values)
+
+
+def _widened(column: CentsColumn) -> List[int]:
+    # to_int() is unbounded ("1e19" sanitizes fine); keep such columns lossless as Python ints.
+    return column if isinstance(column, list) else column.tolist()
+
+
+class PartyRecord:
+    __slots__ = ("nome", "cnpj", "endereco")
+
+    def __init__(self, nome: str = "", cnpj: str = "", endereco: str = "") -> None:
+        self.nome = nome
+        self.cnpj = cnpj
+        self.endereco = endereco
+
+    @classmethod
+    def from_dict(cls, value: Dict[str, Any]) -> "PartyRecord":
+        # The same supplier/client shows up across the whole batch.
+        return cls(
+            nome=sys.intern(value["nome"]),
+            cnpj=sys.intern(value["cnpj"]),
+            endereco=sys.intern(value["endereco"]),
+        )
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"nome": self.nome, "cnpj": self.cnpj, "endereco": self.endereco}
+
+
+class ItemColumns:
+    __slots__ = ("descricao", "quantidade", "valor_unitario_centavos", "valor_total_item_centavos")
+
+    def __init__(self) -> None:
+        self.descricao: List[str] = []
+        self.quantidade: CentsColumn = _cents_column()
+        self.valor_unitario_centavos: CentsColumn = _cents_column()
+        self.valor_total_item_centavos: CentsColumn = _cents_column()
+
+    @classmethod
+    def from_dicts(cls, items: Iterable[Dict[str, Any]]) -> "ItemColumns":
+        columns = cls()
+        for item in items:
+            columns.append(
+                item["descricao"],
+                item["quantidade"],
+                item["valor_unitario_centavos"],
+                item["valor_total_item_centavos"],
+            )
+        return columns
+
+    def append(self, descricao: str, quantidade: int, valor_unitario_centavos: int, valor_total_item_centavos: int) -> None:
+        # Range-check before appending anything so the columns can never end up misaligned.
+        if not _fits_int64(quantidade, valor_unitario_centavos, valor_total_item_centavos):
+            self.quantidade = _widened(self.quantidade)
+            self.valor_unitario_centavos = _widened(self.valor_unitario_centavos)
+            self.valor_total_item_centavos = _widened(self.valor_total_item_centavos)
+        self.descricao.append(descricao)
+        self.quantidade.append(quantidade)
+        self.valor_unitario_centavos.append(valor_unitario_centavos)
+        self.valor_total_item_centavos.append(valor_total_item_centavos)
+
+    def __len__(self) -> int:
+        return len(self.descricao)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "descricao": descricao,
+                "quantidade": quantidade,
+                "valor_unitario_centavos": unitario,
+                "valor_total_item_centavos": total,
+            }
+            for descricao, quantidade, unitario, total in zip(
+                self.descricao,
+                self.quantidade,
+                self.valor_unitario_centavos,
+                self.valor_total_item_centavos,
+            )
+        ]
+
+    def subtotal_centavos(self) -> int:
+        return sum(self.valor_total_item_centavos)
+
+
+class TaxColumns:
+    __slots__ = ("tipo", "valor_centavos")
+
+    def __init__(self) -> None:
+        self.tipo: List[str] = []
+        self.valor_centavos: CentsColumn = _cents_column()
+
+    @classmethod
+    def from_dicts(cls, taxes: Iterable[Dict[str, Any]]) -> "TaxColumns":
+        columns = cls()
+        for tax in taxes:
+            columns.append(tax["tipo"], tax["valor_centavos"])
+        return columns
+
+    def append(self, tipo: str, valor_centavos: int) -> None:
+        if not _fits_int64(valor_centavos):
+            self.valor_centavos = _widened(self.valor_centavos)
+        # Tax types are a tiny vocabulary (ISS, ICMS, PIS, ...).
+        self.tipo.append(sys.intern(tipo))
+        self.valor_centavos.append(valor_centavos)
+
+    def __len__(self) -> int:
+        return len(self.tipo)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [
+            {"tipo": tipo, "valor_centavos": valor}
+            for tipo, valor in zip(self.tipo, self.valor_centavos)
+        ]
+
+    def total_centavos(self) -> int:
+        return sum(self.valor_centavos)
+
+
+class InvoiceRecord:
+    __slots__ = (
+        "numero_fatura",
+        "data_emissao",
+        "data_vencimento",
+        "empresa_emissora",
+        "cliente",
+        "itens",
+        "tributos",
+        "subtotal_itens_centavos",
+        "valor_total_fatura_centavos",
+    )
+
+    def __init__(
+        self,
+        numero_fatura: str,
+        data_emissao: str,
+        data_vencimento: str,
+        empresa_emissora: PartyRecord,
+        cliente: PartyRecord,
+        itens: ItemColumns,
+        tributos: TaxColumns,
+        subtotal_itens_centavos: int,
+        valor_total_fatura_centavos: int,
+    ) -> None:
+        self.numero_fatura = numero_fatura
+        self.data_emissao = data_emissao
+        self.data_vencimento = data_vencimento
+        self.empresa_emissora = empresa_emissora
+        self.cliente = cliente
+        self.itens = itens
+        self.tributos = tributos
+        self.subtotal_itens_centavos = subtotal_itens_centavos
+        self.valor_total_fatura_centavos = valor_total_fatura_centavos
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "InvoiceRecord":
+        """Build a record from a payload returned by sanitize_extracted_payload."""
+        return cls(
+            numero_fatura=payload["numero_fatura"],
+            data_emissao=sys.intern(payload["data_emissao"]),
+            data_vencimento=sys.intern(payload["data_vencimento"]),
+            empresa_emissora=PartyRecord.from_dict(payload["empresa_emissora"]),
+            cliente=PartyRecord.from_dict(payload["cliente"]),
+            itens=ItemColumns.from_dicts(payload["itens"]),
+            tributos=TaxColumns.from_dicts(payload["tributos"]),
+            subtotal_itens_centavos=payload["subtotal_itens_centavos"],
+            valor_total_fatura_centavos=payload["valor_total_fatura_centavos"],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "numero_fatura": self.numero_fatura,
+            "data_emissao": self.data_emissao,
+            "data_vencimento": self.data_vencimento,
+            "empresa_emissora": self.empresa_emissora.to_dict(),
+            "cliente": self.cliente.to_dict(),
+            "itens": self.itens.to_dicts(),
+            "tributos": self.tributos.to_dicts(),
+            "subtotal_itens_centavos": self.subtotal_itens_centavos,
+            "valor_total_fatura_centavos": self.valor_total_fatura_centavos,
+        }
+
+    def subtotal_calculado_centavos(self) -> int:
+        return self.itens.subtotal_centavos()
+
+
+class InvoiceBatch:
+    """In-memory collection of invoice records with batch reconciliation."""
+
+    __slots__ = ("records", "subtotal_itens_centavos", "valor_total_fatura_centavos")
+
+    def __init__(self, records: Iterable[InvoiceRecord] = ()) -> None:
+        self.records: List[InvoiceRecord] = []
+        self.subtotal_itens_centavos: CentsColumn = _cents_column()
+        self.valor_total_fatura_centavos: CentsColumn = _cents_column()
+        for record in records:
+            self.append(record)
+
+    @classmethod
+    def from_dicts(cls, payloads: Iterable[Dict[str, Any]]) -> "InvoiceBatch":
+        return cls(InvoiceRecord.from_dict(payload) for payload in payloads)
+
+    def append(self, record: InvoiceRecord) -> None:
+        if not _fits_int64(record.subtotal_itens_centavos, record.valor_total_fatura_centavos):
+            self.subtotal_itens_centavos = _widened(self.subtotal_itens_centavos)
+            self.valor_total_fatura_centavos = _widened(self.valor_total_fatura_centavos)
+        self.subtotal_itens_centavos.append(record.subtotal_itens_centavos)
+        self.valor_total_fatura_centavos.append(record.valor_total_fatura_centavos)
+        self.records.append(record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[InvoiceRecord]:
+        return iter(self.records)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [record.to_dict() for record in self.records]
+
+    def subtotais_calculados(self) -> List[int]:
+        return [record.subtotal_calculado_centavos() for record in self.records]
+
+    def subtotal_mismatches(self) -> List[Tuple[int, int, int]]:
+        """Return (index, calculated, extracted) for every invoice whose subtotal does not add up."""
+        return [
+            (index, calculado, extraido)
+            for index, (calculado, extraido) in enumerate(
+                zip(self.subtotais_calculados(), self.subtotal_itens_centavos)
+            )
+            if calculado != extraido
+        ]
+
+    def total_tributos_centavos(self) -> List[int]:
+        return [record.tributos.total_centavos() for record in self.records]
+
+    def total_faturado_centavos(self) -> int:
+        return sum(self.valor_total_fatura_centavos)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Compare two --profile runs and fail when a stage's CPU time or peak memory regresses."""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from profiling import load_summary
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Diff two profile directories written by extract_invoice.py --profile.")
+    parser.add_argument("--baseline", required=True, help="Baseline profile directory.")
+    parser.add_argument("--current", required=True, help="Current profile directory.")
+    parser.add_argument("--cpu-threshold", type=float, default=0.25, help="Allowed relative CPU growth (0.25 = +25%%).")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed relative peak memory growth.")
+    parser.add_argument(
+        "--min-cpu-seconds",
+        type=float,
+        default=0.05,
+        help="Ignore CPU growth smaller than this many seconds (timer noise).",
+    )
+    parser.add_argument(
+        "--min-memory-bytes",
+        type=int,
+        default=1024 * 1024,
+        help="Ignore peak memory growth smaller than this many bytes.",
+    )
+    return parser.parse_args()
+
+
+def _growth(baseline: float, current: float) -> float:
+    if baseline <= 0:
+        return float("inf") if current > 0 else 0.0
+    return (current - baseline) / baseline
+
+
+def _bytes(value: Optional[int]) -> str:
+    return "-" if value is None else str(value)
+
+
+def compare(
+    baseline: Dict[str, Dict[str, Any]],
+    current: Dict[str, Dict[str, Any]],
+    cpu_threshold: float,
+    memory_threshold: float,
+    min_cpu_seconds: float,
+    min_memory_bytes: int,
+) -> List[str]:
+    """Return one failure message per stage metric that grew beyond its threshold.
+
+    tracemalloc inflates CPU time, so CPU is only compared between runs made in the same
+    mode, and memory only when both runs traced it.
+    """
+    failures: List[str] = []
+    for stage in sorted(baseline.keys() & current.keys()):
+        base, cur = baseline[stage], current[stage]
+        base_traced = base.get("memory_traced", True)
+        cur_traced = cur.get("memory_traced", True)
+        cpu_delta = cur["cpu_seconds"] - base["cpu_seconds"]
+        if (
+            base_traced == cur_traced
+            and cpu_delta > min_cpu_seconds
+            and _growth(base["cpu_seconds"], cur["cpu_seconds"]) > cpu_threshold
+        ):
+            failures.append(
+                f"{stage}: cpu {base['cpu_seconds']:.3f}s -> {cur['cpu_seconds']:.3f}s "
+                f"(+{_growth(base['cpu_seconds'], cur['cpu_seconds']):.0%})"
+            )
+        if not (base_traced and cur_traced) or base["peak_bytes"] is None or cur["peak_bytes"] is None:
+            continue
+        memory_delta = cur["peak_bytes"] - base["peak_bytes"]
+        if memory_delta > min_memory_bytes and _growth(base["peak_bytes"], cur["peak_bytes"]) > memory_threshold:
+            failures.append(
+                f"{stage}: peak memory {base['peak_bytes']} B -> {cur['peak_bytes']} B "
+                f"(+{_growth(base['peak_bytes'], cur['peak_bytes']):.0%})"
+            )
+    return failures
+
+
+def main() -> int:
+    args = parse_args()
+    try:
+        baseline = load_summary(Path(args.baseline))
+        current = load_summary(Path(args.current))
+    except (OSError, ValueError) as exc:
+        print(f"Error: could not load profile summary ({exc.__class__.__name__}): {exc}", file=sys.stderr)
+        return 1
+
+    print(f"{'stage':<20} {'cpu base':>10} {'cpu cur':>10} {'peak base':>12} {'peak cur':>12}")
+    for stage in sorted(baseline.keys() | current.keys()):
+        base = baseline.get(stage)
+        cur = current.get(stage)
+        if base is None or cur is None:
+            print(f"{stage:<20} only in {'current' if base is None else 'baseline'}")
+            continue
+        if base.get("memory_traced", True) != cur.get("memory_traced", True):
+            print(f"Warning: {stage} was profiled in different modes; CPU not compared.", file=sys.stderr)
+        print(
+            f"{stage:<20} {base['cpu_seconds']:>10.3f} {cur['cpu_seconds']:>10.3f} "
+            f"{_bytes(base['peak_bytes']):>12} {_bytes(cur['peak_bytes']):>12}"
+        )
+
+    failures = compare(
+        baseline,
+        current,
+        args.cpu_threshold,
+        args.memory_threshold,
+        args.min_cpu_seconds,
+        args.min_memory_bytes,
+    )
+    for failure in failures:
+        print(f"Regression: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import cProfile
+import contextlib
+import json
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
+
+SUMMARY_FILE = "summary.json"
+ALLOCATIONS_FILE = "allocations.txt"
+DEFAULT_TOP_N = 20
+# "full" traces memory too; "cpu" skips tracemalloc so CPU times are not inflated.
+PROFILE_MODES = ("full", "cpu")
+_PROFILE_ON = {"1", "true", "yes"}
+_PROFILE_OFF = {"", "0", "false", "no", "off", "none"}
+
+# Collapsed stacks drop call paths worth less than this share of the stage (or 1 us) and
+# stop after this many paths, so huge SDK call graphs cannot make write() hang.
+COLLAPSED_MIN_SHARE = 1e-4
+COLLAPSED_MIN_SECONDS = 1e-6
+COLLAPSED_MAX_DEPTH = 128
+COLLAPSED_MAX_PATHS = 200_000
+
+# The profiler's own frames (_Stage.__enter__/__exit__) live here and are left out of reports.
+_PROFILER_FILE = __file__
+# Dropped from the per-line diff rather than via Snapshot.filter_traces(), which runs an fnmatch
+# per live block and made each stage boundary cost ~0.5 s with a modest heap traced.
+_UNTRACKED_FILES = frozenset(
+    (
+        __file__,
+        tracemalloc.__file__,
+        "<frozen importlib._bootstrap>",
+        "<frozen importlib._bootstrap_external>",
+        "<unknown>",
+    )
+)
+
+FuncKey = Tuple[str, int, str]
+
+
+class _StageStats:
+    __slots__ = ("profile", "calls", "cpu_seconds", "wall_seconds", "peak_bytes", "allocations")
+
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+        self.calls = 0
+        self.cpu_seconds = 0.0
+        self.wall_seconds = 0.0
+        self.peak_bytes = 0
+        self.allocations: Dict[Tuple[str, int], List[int]] = {}
+
+
+class _Stage:
+    """One profiled run of a stage; a plain class so its frames are easy to filter out."""
+
+    def __init__(self, profiler: "StageProfiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.stats = profiler._stages.setdefault(name, _StageStats())
+        self.before: Optional[tracemalloc.Snapshot] = None
+        self.start_traced = 0
+        self.cpu_start = 0.0
+        self.wall_start = 0.0
+
+    def __enter__(self) -> None:
+        profiler = self.profiler
+        if profiler._active is not None:
+            raise RuntimeError(f"Profiling stage '{self.name}' cannot run inside stage '{profiler._active}'.")
+        profiler._active = self.name
+        if profiler.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(1)
+                profiler._started_tracemalloc = True
+            self.before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            self.start_traced, _ = tracemalloc.get_traced_memory()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        self.stats.profile.enable()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        stats = self.stats
+        stats.profile.disable()
+        stats.wall_seconds += time.perf_counter() - self.wall_start
+        stats.cpu_seconds += time.process_time() - self.cpu_start
+        if self.before is not None:
+            _, peak = tracemalloc.get_traced_memory()
+            stats.peak_bytes = max(stats.peak_bytes, peak - self.start_traced)
+            after = tracemalloc.take_snapshot()
+            for diff in after.compare_to(self.before, "lineno"):
+                if diff.size_diff <= 0:
+                    continue
+                frame = diff.traceback[0]
+                if frame.filename in _UNTRACKED_FILES:
+                    continue
+                totals = stats.allocations.setdefault((frame.filename, frame.lineno), [0, 0])
+                totals[0] += diff.size_diff
+                totals[1] += diff.count_diff
+        stats.calls += 1
+        self.profiler._active = None
+
+
+class StageProfiler:
+    """Per-stage cProfile + tracemalloc capture; a disabled profiler makes stage() a no-op.
+
+    tracemalloc hooks every allocation and can inflate CPU time 2-50x, so with
+    trace_memory=True the CPU numbers largely measure tracing overhead. Use
+    trace_memory=False (CLI: --profile cpu) when CPU time is what matters.
+    """
+
+    def __init__(self, enabled: bool = False, top_n: int = DEFAULT_TOP_N, trace_memory: bool = True) -> None:
+        self.enabled = enabled
+        self.top_n = top_n
+        self.trace_memory = trace_memory
+        self._stages: Dict[str, _StageStats] = {}
+        self._active: Optional[str] = None
+        self._started_tracemalloc = False
+
+    @classmethod
+    def for_mode(cls, mode: Optional[str], top_n: int = DEFAULT_TOP_N) -> "StageProfiler":
+        """Build the profiler for a parse_profile_mode() result; None gives a disabled profiler."""
+        return cls(enabled=mode is not None, top_n=top_n, trace_memory=mode != "cpu")
+
+    def stage(self, name: str) -> ContextManager[None]:
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return _Stage(self, name)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {
+                "calls": stats.calls,
+                "cpu_seconds": round(stats.cpu_seconds, 6),
+                "wall_seconds": round(stats.wall_seconds, 6),
+                "memory_traced": self.trace_memory,
+                "peak_bytes": stats.peak_bytes if self.trace_memory else None,
+                "allocated_bytes": sum(size for size, _ in stats.allocations.values()) if self.trace_memory else None,
+            }
+            for name, stats in self._stages.items()
+        }
+
+    def write(self, out_dir: Path) -> List[Path]:
+        """Write <stage>.prof, <stage>.collapsed, allocations.txt and summary.json; returns written paths."""
+        if not self.enabled:
+            return []
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        written: List[Path] = []
+        for name, stats in self._stages.items():
+            prof_path = out_dir / f"{name}.prof"
+            stats.profile.dump_stats(str(prof_path))
+            collapsed_path = out_dir / f"{name}.collapsed"
+            # pstats.Stats refuses a profile that recorded no calls (e.g. a stage that raised at once).
+            collapsed = collapsed_stacks(pstats.Stats(stats.profile)) if stats.profile.stats else ""  # type: ignore[attr-defined]
+            collapsed_path.write_text(collapsed, encoding="utf-8")
+            written.extend([prof_path, collapsed_path])
+
+        allocations_path = out_dir / ALLOCATIONS_FILE
+        allocations_path.write_text(self._allocation_report(), encoding="utf-8")
+        summary_path = out_dir / SUMMARY_FILE
+        summary_path.write_text(json.dumps(self.summary(), indent=2), encoding="utf-8")
+        written.extend([allocations_path, summary_path])
+        return written
+
+    def _allocation_report(self) -> str:
+        lines: List[str] = []
+        for name, stats in self._stages.items():
+            if not self.trace_memory:
+                lines.append(f"[{name}] memory not traced, cpu={stats.cpu_seconds:.3f} s, wall={stats.wall_seconds:.3f} s")
+                lines.append("")
+                continue
+            lines.append(f"[{name}] peak={stats.peak_bytes} B, cpu={stats.cpu_seconds:.3f} s, wall={stats.wall_seconds:.3f} s")
+            top = sorted(stats.allocations.items(), key=lambda entry: entry[1][0], reverse=True)[: self.top_n]
+            for (filename, lineno), (size, count) in top:
+                lines.append(f"  {size:>12} B {count:>8} blocks  {filename}:{lineno}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+def parse_profile_mode(value: Any) -> Optional[str]:
+    """Map a --profile / StartEvent "profile" value to "full", "cpu" or None (profiling off)."""
+    if value is None or value is False:
+        return None
+    if value is True:
+        return "full"
+    mode = str(value).strip().lower()
+    if mode in PROFILE_MODES:
+        return mode
+    if mode in _PROFILE_ON:
+        return "full"
+    if mode in _PROFILE_OFF:
+        return None
+    raise ValueError(f"Unknown profile mode '{value}'; expected one of {', '.join(PROFILE_MODES)}.")
+
+
+def _label(func: FuncKey) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({Path(filename).name}:{lineno})"
+
+
+def collapsed_stacks(stats: pstats.Stats) -> str:
+    """Render cProfile data as collapsed stacks ("a;b;c <microseconds>") for flamegraph tools.
+
+    cProfile only records caller/callee edges, so each callee's time is split
+    across its call paths in proportion to the cumulative time on each edge.
+    Paths are pruned by COLLAPSED_MIN_SHARE, COLLAPSED_MAX_DEPTH and
+    COLLAPSED_MAX_PATHS to keep the walk bounded on large call graphs.
+    """
+    raw: Dict[FuncKey, Any] = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[FuncKey, Dict[FuncKey, float]] = {}
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge[3]
+
+    # A function called straight from the stage body has no profiled caller for those calls,
+    # so whatever cumulative time its profiled callers do not account for starts at the root.
+    roots: Dict[FuncKey, float] = {}
+    for func, (_, _, _, cumulative, callers) in raw.items():
+        unattributed = cumulative - sum(edge[3] for edge in callers.values())
+        if unattributed > 0 and func[0] != _PROFILER_FILE:
+            roots[func] = unattributed
+    total = sum(roots.values())
+    min_budget = max(COLLAPSED_MIN_SECONDS, total * COLLAPSED_MIN_SHARE)
+    lines: Dict[str, int] = {}
+    visited = 0
+
+    def visit(func: FuncKey, path: Tuple[FuncKey, ...], budget: float) -> None:
+        nonlocal visited
+        _, _, own_time, cumulative, _ = raw[func]
+        if cumulative <= 0 or budget < min_budget or visited >= COLLAPSED_MAX_PATHS:
+            return
+        visited += 1
+        share = min(budget / cumulative, 1.0)
+        stack = path + (func,)
+        key = ";".join(_label(frame) for frame in stack)
+        micros = int(own_time * share * 1_000_000)
+        if micros > 0:
+            lines[key] = lines.get(key, 0) + micros
+        if len(stack) >= COLLAPSED_MAX_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, {}).items():
+            if callee not in stack and callee in raw and callee[0] != _PROFILER_FILE:
+                visit(callee, stack, edge_time * share)
+
+    for root, budget in roots.items():
+        visit(root, (), budget)
+    return "".join(f"{key} {value}\n" for key, value in sorted(lines.items()))
+
+
+def load_summary(profile_dir: Path) -> Dict[str, Dict[str, Any]]:
+    return json.loads((profile_dir / SUMMARY_FILE).read_text(encoding="utf-8"))
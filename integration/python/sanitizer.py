@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import math
+import re
 import unicodedata
+from functools import lru_cache
 from typing import Any, Dict, List
 
 ROOT_KEYS = {
@@ -24,6 +26,15 @@ ITEM_KEYS = {
 }
 TAX_KEYS = {"tipo", "valor_centavos"}
 MOJIBAKE_MARKERS = ("Ã", "Â", "Ð", "�")
+TEXT_CACHE_SIZE = 4096
+
+# UTF-8 byte sequences read as latin-1: a lead byte followed by its continuation bytes.
+_MOJIBAKE_SPAN_PATTERN = re.compile(
+    "(?:[\xc2-\xdf][\x80-\xbf]|[\xe0-\xef][\x80-\xbf]{2}|[\xf0-\xf4][\x80-\xbf]{3})+"
+)
+_C1_PATTERN = re.compile("[\x80-\x9f]")
+# C0/C1 control characters that str.split() would not already treat as whitespace.
+_CONTROL_PATTERN = re.compile("[\x00-\x08\x0e-\x1b\x7f-\x84\x86-\x9f]+")
 
 
 def normalize_key(key: str) -> str:
@@ -79,32 +90,76 @@ def to_int(value: Any, default: int = 0) -> int:
     return default
 
 
-def _as_string(value: Any) -> str:
-    if value is None:
-        return ""
-    return _fix_mojibake(str(value).strip())
+def _decode_mojibake(text: str) -> str:
+    fixed = text.encode("latin-1").decode("utf-8")
+    if "\ufffd" in fixed:
+        raise UnicodeError("repair would introduce replacement characters")
+    return fixed
+
+
+def _repair_mojibake_span(match: re.Match[str]) -> str:
+    span = match.group()
+    try:
+        return _decode_mojibake(span)
+    except UnicodeError:
+        return span
 
 
 def _fix_mojibake(text: str) -> str:
-    if text == "":
-        return text
-    if not any(marker in text for marker in MOJIBAKE_MARKERS):
-        return text
     try:
-        fixed = text.encode("latin-1").decode("utf-8")
+        return _decode_mojibake(text)
     except UnicodeError:
+        pass
+    # Mixed text (e.g. a real "€" next to garbled accents): repair only the affected spans, and only
+    # if that clears every marker. A leftover one means double encoding ("ÃƒÂ§"); leave it alone.
+    fixed = _MOJIBAKE_SPAN_PATTERN.sub(_repair_mojibake_span, text)
+    if "Ã" in fixed or "Â" in fixed or "Ð" in fixed or "�" in fixed:
+        return text
+    return fixed
+
+
+def normalize_text(text: str) -> str:
+    """Repair mojibake, drop control characters and collapse whitespace."""
+    # Same markers as MOJIBAKE_MARKERS, unrolled: a generator here costs more than the scans.
+    if "Ã" in text or "Â" in text or "Ð" in text or "�" in text:
+        text = _fix_mojibake(text)
+    if text.isprintable():
+        text = text.strip()
+        return " ".join(text.split()) if "  " in text else text
+    text = " ".join(text.split())
+    if text.isprintable():
         return text
-    original_noise = sum(text.count(marker) for marker in MOJIBAKE_MARKERS)
-    fixed_noise = sum(fixed.count(marker) for marker in MOJIBAKE_MARKERS)
-    return fixed if fixed_noise < original_noise else text
+    # Only control characters are left; C1 bytes may be the tail of a garbled "â\x80\x93" dash.
+    if _C1_PATTERN.search(text):
+        text = _fix_mojibake(text)
+    text = _CONTROL_PATTERN.sub("", text).strip()
+    return " ".join(text.split()) if "  " in text else text
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def clean_text(text: str) -> str:
+    """Cached normalize_text for party and tax fields, which repeat across a batch."""
+    return normalize_text(text)
+
+
+def _as_string(value: Any) -> str:
+    if value is None:
+        return ""
+    return normalize_text(str(value))
+
+
+def _as_cached_string(value: Any) -> str:
+    if value is None:
+        return ""
+    return clean_text(str(value))
 
 
 def _sanitize_party(value: Any) -> Dict[str, str]:
     source = value if isinstance(value, dict) else {}
     return {
-        "nome": _as_string(source.get("nome")),
-        "cnpj": _as_string(source.get("cnpj")),
-        "endereco": _as_string(source.get("endereco")),
+        "nome": _as_cached_string(source.get("nome")),
+        "cnpj": _as_cached_string(source.get("cnpj")),
+        "endereco": _as_cached_string(source.get("endereco")),
     }
 
 
@@ -137,7 +192,7 @@ def _sanitize_taxes(value: Any) -> List[Dict[str, Any]]:
             continue
         out.append(
             {
-                "tipo": _as_string(tax.get("tipo")),
+                "tipo": _as_cached_string(tax.get("tipo")),
                 "valor_centavos": to_int(tax.get("valor_centavos")),
             }
         )
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from array import array
+
+from invoice_records import InvoiceBatch, InvoiceRecord, ItemColumns, PartyRecord, TaxColumns
+from sanitizer import assert_payload_contract, sanitize_extracted_payload, to_int
+
+
+def _payload(numero: str, subtotal: int) -> dict:
+    return sanitize_extracted_payload(
+        {
+            "numero_fatura": numero,
+            "data_emissao": "2026-02-10",
+            "data_vencimento": "2026-02-25",
+            "empresa_emissora": {
+                "nome": "Tech Solutions Brasil Ltda",
+                "cnpj": "12.345.678/0001-90",
+                "endereco": "Rua X",
+            },
+            "cliente": {
+                "nome": "Cliente",
+                "cnpj": "98.765.432/0001-55",
+                "endereco": "Rua Y",
+            },
+            "itens": [
+                {
+                    "descricao": "Servico A",
+                    "quantidade": 2,
+                    "valor_unitario_centavos": 100000,
+                    "valor_total_item_centavos": 200000,
+                },
+                {
+                    "descricao": "Servico B",
+                    "quantidade": 1,
+                    "valor_unitario_centavos": 150000,
+                    "valor_total_item_centavos": 150000,
+                },
+            ],
+            "tributos": [
+                {"tipo": "ISS", "valor_centavos": 17500},
+                {"tipo": "PIS", "valor_centavos": 2275},
+            ],
+            "subtotal_itens_centavos": subtotal,
+            "valor_total_fatura_centavos": 350000,
+        }
+    )
+
+
+def main() -> int:
+    payload = _payload("FAT-1", 350000)
+    record = InvoiceRecord.from_dict(payload)
+    roundtrip = record.to_dict()
+    assert roundtrip == payload
+    assert list(roundtrip.keys()) == list(payload.keys())
+    assert_payload_contract(roundtrip)
+    assert all(type(item["quantidade"]) is int for item in roundtrip["itens"])
+    assert record.subtotal_calculado_centavos() == 350000
+
+    empty = sanitize_extracted_payload({})
+    assert InvoiceRecord.from_dict(empty).to_dict() == empty
+
+    batch = InvoiceBatch.from_dicts([payload, _payload("FAT-2", 340000), empty])
+    assert len(batch) == 3
+    assert batch.to_dicts() == [payload, _payload("FAT-2", 340000), empty]
+    assert list(batch.subtotais_calculados()) == [350000, 350000, 0]
+    assert batch.subtotal_mismatches() == [(1, 350000, 340000)]
+    assert list(batch.total_tributos_centavos()) == [19775, 19775, 0]
+    assert batch.total_faturado_centavos() == 700000
+
+    # Values outside int64 switch that column to Python ints instead of failing the whole batch.
+    overflowing = _payload("FAT-3", 350000)
+    overflowing["itens"][0]["quantidade"] = to_int("1e19")
+    overflowing["tributos"][1]["valor_centavos"] = -(2**70)
+    assert overflowing["itens"][0]["quantidade"] == 10**19
+    mixed = InvoiceBatch.from_dicts([payload, overflowing])
+    assert mixed.to_dicts() == [payload, overflowing]
+    assert list(mixed.total_tributos_centavos()) == [19775, 17500 - 2**70]
+    assert isinstance(record.itens.quantidade, array)
+    assert isinstance(mixed.records[1].itens.quantidade, list)
+
+    columns = InvoiceRecord.from_dict(payload).itens
+    columns.append("Servico C", 1, 2**63, 2**63)
+    assert len(columns) == 3 and len(columns.valor_unitario_centavos) == 3
+    assert columns.subtotal_centavos() == 350000 + 2**63
+
+    # Records built directly are range-checked before any batch column grows.
+    huge = InvoiceRecord(
+        numero_fatura="FAT-4",
+        data_emissao="",
+        data_vencimento="",
+        empresa_emissora=PartyRecord(),
+        cliente=PartyRecord(),
+        itens=ItemColumns(),
+        tributos=TaxColumns(),
+        subtotal_itens_centavos=2**63,
+        valor_total_fatura_centavos=2**63,
+    )
+    batch.append(huge)
+    assert len(batch) == len(batch.subtotal_itens_centavos) == len(batch.valor_total_fatura_centavos) == 4
+    assert batch.subtotal_mismatches() == [(1, 350000, 340000), (3, 0, 2**63)]
+    assert batch.total_faturado_centavos() == 700000 + 2**63
+
+    print("invoice-records-test-ok")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import pstats
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from profile_regression import compare
+from profiling import (
+    ALLOCATIONS_FILE,
+    COLLAPSED_MAX_DEPTH,
+    SUMMARY_FILE,
+    StageProfiler,
+    collapsed_stacks,
+    load_summary,
+    parse_profile_mode,
+)
+
+
+def _busy(n: int) -> list:
+    return [str(i) * 8 for i in range(n)]
+
+
+@contextlib.contextmanager
+def _heavy_cm():
+    sum(i * i for i in range(200000))
+    yield
+
+
+def _uses_heavy_cm() -> None:
+    with _heavy_cm():
+        pass
+
+
+class _RawStats:
+    """Stand-in for pstats.Stats: collapsed_stacks only reads .stats."""
+
+    def __init__(self, stats: dict) -> None:
+        self.stats = stats
+
+
+def _layered_call_graph(layers: int, width: int) -> _RawStats:
+    # Every function calls every function of the next layer: width ** layers simple paths.
+    rows = [[("graph.py", layer * 1000 + index, f"f{layer}_{index}") for index in range(width)] for layer in range(layers)]
+    stats = {}
+    for layer, row in enumerate(rows):
+        for func in row:
+            callers = {} if layer == 0 else {caller: (1, 1, 0.0, 1.0 / width) for caller in rows[layer - 1]}
+            stats[func] = (width, width, 0.01, 1.0, callers)
+    return _RawStats(stats)
+
+
+def _chain_call_graph(length: int) -> _RawStats:
+    funcs = [("chain.py", index, f"c{index}") for index in range(length)]
+    stats = {}
+    for index, func in enumerate(funcs):
+        callers = {} if index == 0 else {funcs[index - 1]: (1, 1, 0.0, 1.0)}
+        stats[func] = (1, 1, 0.001, 1.0, callers)
+    return _RawStats(stats)
+
+
+def main() -> int:
+    disabled = StageProfiler()
+    with disabled.stage("noop"):
+        _busy(10)
+    assert disabled.summary() == {}
+
+    # CLI (--profile, --profile cpu) and workflow StartEvent values share one parser.
+    assert parse_profile_mode(None) is None and parse_profile_mode("") is None
+    assert parse_profile_mode("false") is None and parse_profile_mode(False) is None
+    assert parse_profile_mode("full") == "full" and parse_profile_mode(" FULL ") == "full"
+    assert parse_profile_mode(True) == "full" and parse_profile_mode("yes") == "full"
+    assert parse_profile_mode("cpu") == "cpu"
+    try:
+        parse_profile_mode("fulll")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown profile modes must be rejected")
+    assert StageProfiler.for_mode(None).enabled is False
+    assert StageProfiler.for_mode("full").trace_memory is True
+    cpu_mode = StageProfiler.for_mode("cpu", top_n=3)
+    assert cpu_mode.enabled and not cpu_mode.trace_memory and cpu_mode.top_n == 3
+
+    profiler = StageProfiler(enabled=True, top_n=5)
+    kept = []
+    with profiler.stage("sanitize"):
+        kept.append(_busy(20000))
+    try:
+        with profiler.stage("extraction"):
+            raise ValueError("boom")
+    except ValueError:
+        pass
+    with profiler.stage("sanitize"):
+        kept.append(_busy(100))
+
+    try:
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                pass
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("nested stages must be rejected")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        written = profiler.write(out_dir)
+        assert out_dir / SUMMARY_FILE in written
+        assert (out_dir / "sanitize.prof").exists()
+        collapsed = (out_dir / "sanitize.collapsed").read_text(encoding="utf-8")
+        assert "_busy (test_profiling.py:" in collapsed
+        for line in collapsed.splitlines():
+            stack, _, micros = line.rpartition(" ")
+            assert stack and int(micros) > 0
+        assert "[sanitize]" in (out_dir / ALLOCATIONS_FILE).read_text(encoding="utf-8")
+
+        blocked = out_dir / "not-a-dir"
+        blocked.write_text("", encoding="utf-8")
+        try:
+            profiler.write(blocked / "profile")
+        except OSError:
+            pass
+        else:
+            raise AssertionError("write() must surface OSError for the entry points to report")
+
+        summary = load_summary(out_dir)
+        assert summary["sanitize"]["calls"] == 2
+        assert summary["extraction"]["calls"] == 1
+        assert summary["sanitize"]["peak_bytes"] > 0
+        assert summary["sanitize"]["allocated_bytes"] > 0
+        json.dumps(summary)
+
+    # Work inside a @contextmanager generator must stay in the flamegraph, called from a
+    # helper or straight from the stage body.
+    cm_profiler = StageProfiler(enabled=True, trace_memory=False)
+    with cm_profiler.stage("extraction"):
+        _uses_heavy_cm()
+        with _heavy_cm():
+            pass
+    assert not tracemalloc.is_tracing()
+    cm_summary = cm_profiler.summary()["extraction"]
+    assert cm_summary["memory_traced"] is False and cm_summary["peak_bytes"] is None
+    cm_lines = collapsed_stacks(pstats.Stats(cm_profiler._stages["extraction"].profile)).splitlines()
+    heavy = [line for line in cm_lines if "_heavy_cm (test_profiling.py:" in line]
+    assert any(line.startswith("_uses_heavy_cm") for line in heavy)
+    assert any(line.startswith("__enter__ (contextlib.py") for line in heavy)
+    heavy_micros = sum(int(line.rpartition(" ")[2]) for line in heavy)
+    assert heavy_micros > cm_summary["cpu_seconds"] * 1_000_000 * 0.5
+    assert not any("(profiling.py:" in line for line in cm_lines)
+
+    started = time.perf_counter()
+    wide = collapsed_stacks(_layered_call_graph(layers=12, width=30))
+    narrow = collapsed_stacks(_layered_call_graph(layers=40, width=2))
+    deep = collapsed_stacks(_chain_call_graph(500))
+    assert time.perf_counter() - started < 5.0, "collapsed_stacks must stay bounded on large call graphs"
+    assert wide and narrow
+    assert max(line.count(";") for line in deep.splitlines()) == COLLAPSED_MAX_DEPTH - 1
+
+    baseline = {
+        "sanitize": {"cpu_seconds": 1.0, "peak_bytes": 10_000_000},
+        "extraction": {"cpu_seconds": 2.0, "peak_bytes": 1_000},
+    }
+    current = {
+        "sanitize": {"cpu_seconds": 1.5, "peak_bytes": 20_000_000},
+        "extraction": {"cpu_seconds": 2.1, "peak_bytes": 5_000},
+        "serialization": {"cpu_seconds": 9.0, "peak_bytes": 9_000_000},
+    }
+    failures = compare(baseline, current, 0.25, 0.25, 0.05, 1024 * 1024)
+    assert len(failures) == 2
+    assert failures[0].startswith("sanitize: cpu")
+    assert failures[1].startswith("sanitize: peak memory")
+    assert compare(baseline, baseline, 0.25, 0.25, 0.05, 1024 * 1024) == []
+
+    cpu_only = {"sanitize": {"cpu_seconds": 0.2, "memory_traced": False, "peak_bytes": None}}
+    assert compare(baseline, cpu_only, 0.25, 0.25, 0.05, 1024 * 1024) == []
+    slower = {"sanitize": {"cpu_seconds": 0.5, "memory_traced": False, "peak_bytes": None}}
+    assert compare(cpu_only, slower, 0.25, 0.25, 0.05, 1024 * 1024) == ["sanitize: cpu 0.200s -> 0.500s (+150%)"]
+
+    print("profiling-test-ok")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from sanitizer import assert_payload_contract, sanitize_extracted_payload
+from sanitizer import assert_payload_contract, clean_text, normalize_text, sanitize_extracted_payload
 
 
 def main() -> int:
@@ -81,6 +81,32 @@ def main() -> int:
     assert mojibake_payload["cliente"]["nome"] == "Contábil Moderna"
     assert "Florianópolis" in mojibake_payload["cliente"]["endereco"]
 
+    assert normalize_text("  Servico   de\tsuporte\n mensal  ") == "Servico de suporte mensal"
+    assert normalize_text("Linha\x00com\x07controle") == "Linhacomcontrole"
+    assert normalize_text("Rua A \u00e2\x80\x93 S\u00c3\u00a3o Paulo") == "Rua A \u2013 São Paulo"
+    assert normalize_text("Pre\u00c3\u00a7o \u2014 \u20ac 10") == "Preço \u2014 \u20ac 10"
+    assert normalize_text("S\u00c3O PAULO") == "S\u00c3O PAULO"
+    assert normalize_text("R$\u00c2\u00a010,00") == "R$ 10,00"
+    assert normalize_text("Valor \ufffd indefinido") == "Valor \ufffd indefinido"
+    assert normalize_text("ASCII simples") == "ASCII simples"
+    # Double-encoded text cannot be fully repaired span by span, so it is left as it was.
+    assert normalize_text("\u00c3\u0192\u00c2\u00a7\u00e3o") == "\u00c3\u0192\u00c2\u00a7\u00e3o"
+    assert normalize_text("\u20ac Servi\u00c3\u0192\u00c2\u00a7o") == "\u20ac Servi\u00c3\u0192\u00c2\u00a7o"
+
+    clean_text.cache_clear()
+    for index in range(3):
+        sanitize_extracted_payload(
+            {
+                "empresa_emissora": {"nome": "Fornecedor", "cnpj": "12.345.678/0001-90", "endereco": "Rua X"},
+                "cliente": {"nome": "Cliente", "cnpj": "98.765.432/0001-55", "endereco": "Rua Y"},
+                "itens": [{"descricao": f"Servico {index}-{position}"} for position in range(50)],
+                "tributos": [{"tipo": "ISS"}, {"tipo": "PIS"}],
+            }
+        )
+    cache = clean_text.cache_info()
+    assert cache.currsize == 8, "only party and tax fields are cached"
+    assert cache.misses == 8 and cache.hits == 16
+
     print("sanitizer-test-ok")
     return 0
 
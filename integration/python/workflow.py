@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import sys
 from pathlib import Path
 from typing import Any
 
@@ -8,6 +9,7 @@ from llama_cloud_services import LlamaExtract
 from workflows import Workflow, step
 from workflows.events import StartEvent, StopEvent
 
+from .profiling import StageProfiler, parse_profile_mode
 from .sanitizer import sanitize_extracted_payload
 
 
@@ -25,6 +27,13 @@ def _resolve_input_path(raw_path: str) -> Path:
     return (_repo_root() / path).resolve()
 
 
+def _resolve_output_path(raw_path: str) -> Path:
+    path = Path(raw_path).expanduser()
+    if path.is_absolute():
+        return path
+    return (_repo_root() / path).resolve()
+
+
 def _extract_run_data(run_obj: Any) -> Any:
     run = run_obj[0] if isinstance(run_obj, list) and run_obj else run_obj
     data = getattr(run, "data", run)
@@ -51,17 +60,35 @@ class InvoiceWorkflow(Workflow):
         if not input_file.exists() or not input_file.is_file():
             raise ValueError(f"Input file not found: {input_file}")
 
-        extractor = LlamaExtract()
-        agent = extractor.get_agent(name=agent_name)
-        if not hasattr(agent, "extract"):
-            raise RuntimeError("Agent object does not support extract().")
-
-        result = agent.extract(input_file)
-        payload = _extract_run_data(result)
-        if not isinstance(payload, dict):
-            raise ValueError("Extraction output is not a JSON object.")
-
-        normalized = sanitize_extracted_payload(payload)
+        profiler = StageProfiler.for_mode(parse_profile_mode(ev.get("profile")))
+        try:
+            with profiler.stage("agent_resolution"):
+                extractor = LlamaExtract()
+                agent = extractor.get_agent(name=agent_name)
+                if not hasattr(agent, "extract"):
+                    raise RuntimeError("Agent object does not support extract().")
+
+            with profiler.stage("extraction"):
+                result = agent.extract(input_file)
+                payload = _extract_run_data(result)
+            if not isinstance(payload, dict):
+                raise ValueError("Extraction output is not a JSON object.")
+
+            with profiler.stage("sanitize"):
+                normalized = sanitize_extracted_payload(payload)
+        finally:
+            if profiler.enabled:
+                profile_dir = _resolve_output_path(
+                    str(ev.get("profile_dir", "") or "examples/output/profile").strip()
+                )
+                # Never let a failed profile write mask the extraction result or its exception.
+                try:
+                    profiler.write(profile_dir)
+                except OSError as exc:
+                    print(
+                        f"Warning: could not write profile to {profile_dir} ({exc.__class__.__name__}): {exc}",
+                        file=sys.stderr,
+                    )
         return StopEvent(result=normalized)
 
 